@@ -13,6 +13,7 @@ GREEN='\033[0;32m'
 YELLOW='\033[1;33m'
 BLUE='\033[0;34m'
 NC='\033[0m' # No Color
+readonly RED GREEN YELLOW BLUE NC
 
 # Логирование
 log_info() { echo -e "${BLUE}[INFO]${NC} $1"; }
@@ -102,7 +103,7 @@ generate_uuid() {
     if command -v uuidgen &> /dev/null; then
         uuidgen
     else
-        cat /proc/sys/kernel/random/uuid
+        echo "$(</proc/sys/kernel/random/uuid)"
     fi
 }
 
@@ -114,10 +115,53 @@ generate_short_id() {
     openssl rand -hex 8
 }
 
+# Внешний IP запрашивается в нескольких местах (ссылка, файл клиента) -
+# кэшируем результат, чтобы не ходить в сеть повторно. Вызывается в
+# текущем шелле (не через $(...)), иначе кэш не сохранится.
+SERVER_IP=""
+SERVER_IP_PREFETCH_FILE=""
+SERVER_IP_PREFETCH_PID=""
+
+# Запрос внешнего IP уходит в фон еще до интерактивных вопросов: пока
+# пользователь выбирает протокол, сетевой запрос уже выполняется, и к
+# моменту генерации ссылки ответ обычно готов.
+prefetch_server_ip() {
+    SERVER_IP_PREFETCH_FILE=$(mktemp)
+    curl -s --max-time 10 ifconfig.me > "$SERVER_IP_PREFETCH_FILE" 2>/dev/null &
+    SERVER_IP_PREFETCH_PID=$!
+}
+
+ensure_server_ip() {
+    if [ -n "$SERVER_IP" ]; then
+        return
+    fi
+    if [ -n "$SERVER_IP_PREFETCH_PID" ]; then
+        wait "$SERVER_IP_PREFETCH_PID" 2>/dev/null || true
+        SERVER_IP=$(<"$SERVER_IP_PREFETCH_FILE")
+        rm -f "$SERVER_IP_PREFETCH_FILE"
+        SERVER_IP_PREFETCH_PID=""
+    fi
+    if [ -z "$SERVER_IP" ]; then
+        SERVER_IP=$(curl -s --max-time 10 ifconfig.me)
+    fi
+}
+
 # ========================================
 # Пользовательский ввод
 # ========================================
 
+# Таблицы выбора вместо цепочек case: ответ пользователя - это ключ,
+# одна подстановка вместо перебора веток
+declare -rA PROTOCOL_TABLE=(
+    [1]="vless"
+    [2]="vless-reality"
+    [3]="vless-reality-xhttp"
+)
+declare -rA FINGERPRINT_TABLE=(
+    [1]="chrome" [2]="firefox" [3]="safari" [4]="ios"
+    [5]="android" [6]="edge" [7]="random"
+)
+
 get_user_input() {
     clear
     echo "═══════════════════════════════════════════"
@@ -132,12 +176,11 @@ get_user_input() {
     echo "3) VLESS + Reality + XHTTP"
     read -p "Выбор [1-3]: " PROTOCOL_CHOICE
     
-    case $PROTOCOL_CHOICE in
-        1) PROTOCOL="vless" ;;
-        2) PROTOCOL="vless-reality" ;;
-        3) PROTOCOL="vless-reality-xhttp" ;;
-        *) log_error "Неверный выбор"; exit 1 ;;
-    esac
+    PROTOCOL=${PROTOCOL_TABLE[${PROTOCOL_CHOICE:-_}]:-}
+    if [ -z "$PROTOCOL" ]; then
+        log_error "Неверный выбор"
+        exit 1
+    fi
     
     # UUID
     DEFAULT_UUID=$(generate_uuid)
@@ -171,16 +214,7 @@ get_user_input() {
         echo "7) random"
         read -p "Выбор [1-7]: " FP_CHOICE
         
-        case $FP_CHOICE in
-            1) FINGERPRINT="chrome" ;;
-            2) FINGERPRINT="firefox" ;;
-            3) FINGERPRINT="safari" ;;
-            4) FINGERPRINT="ios" ;;
-            5) FINGERPRINT="android" ;;
-            6) FINGERPRINT="edge" ;;
-            7) FINGERPRINT="random" ;;
-            *) FINGERPRINT="chrome" ;;
-        esac
+        FINGERPRINT=${FINGERPRINT_TABLE[${FP_CHOICE:-_}]:-chrome}
         
         # Генерация Reality ключей
         log_info "Генерация Reality ключей..."
@@ -358,17 +392,22 @@ EOF
 # ========================================
 
 generate_client_link() {
-    SERVER_IP=$(curl -s ifconfig.me)
+    ensure_server_ip
+    
+    # Общие части ссылки собираются один раз, ветки case добавляют
+    # только свои параметры
+    local BASE="vless://${USER_UUID}@${SERVER_IP}:${PORT}?encryption=none"
+    local REALITY_PARAMS="security=reality&sni=${SNI}&fp=${FINGERPRINT}&pbk=${PUBLIC_KEY}&sid=${SHORT_ID}"
     
     case $PROTOCOL in
         "vless")
-            LINK="vless://${USER_UUID}@${SERVER_IP}:${PORT}?encryption=none&security=tls&type=tcp#XrayVPN"
+            LINK="${BASE}&security=tls&type=tcp#XrayVPN"
             ;;
         "vless-reality")
-            LINK="vless://${USER_UUID}@${SERVER_IP}:${PORT}?encryption=none&flow=xtls-rprx-vision&security=reality&sni=${SNI}&fp=${FINGERPRINT}&pbk=${PUBLIC_KEY}&sid=${SHORT_ID}&type=tcp#XrayReality"
+            LINK="${BASE}&flow=xtls-rprx-vision&${REALITY_PARAMS}&type=tcp#XrayReality"
             ;;
         "vless-reality-xhttp")
-            LINK="vless://${USER_UUID}@${SERVER_IP}:${PORT}?encryption=none&security=reality&sni=${SNI}&fp=${FINGERPRINT}&pbk=${PUBLIC_KEY}&sid=${SHORT_ID}&type=xhttp&path=${XHTTP_PATH}&host=${SNI}#XrayRealityXHTTP"
+            LINK="${BASE}&${REALITY_PARAMS}&type=xhttp&path=${XHTTP_PATH}&host=${SNI}#XrayRealityXHTTP"
             ;;
     esac
     
@@ -377,6 +416,7 @@ generate_client_link() {
 
 save_client_info() {
     local CLIENT_FILE="/root/xray_client_info.txt"
+    ensure_server_ip
     local LINK=$(generate_client_link)
     
     cat > $CLIENT_FILE <<EOF
@@ -385,7 +425,7 @@ save_client_info() {
 ═══════════════════════════════════════════
 
 Протокол: $PROTOCOL
-Сервер: $(curl -s ifconfig.me)
+Сервер: $SERVER_IP
 Порт: $PORT
 UUID: $USER_UUID
 EOF
@@ -446,7 +486,8 @@ main() {
     install_dependencies
     install_xray
     enable_bbr
-    
+    prefetch_server_ip
+
     # Получение настроек от пользователя
     get_user_input
     
@@ -14,6 +14,7 @@ BLUE='\033[0;34m'
 MAGENTA='\033[0;35m'
 CYAN='\033[0;36m'
 NC='\033[0m'
+readonly RED GREEN YELLOW BLUE MAGENTA CYAN NC
 
 log_info() { echo -e "${BLUE}[INFO]${NC} $1"; }
 log_success() { echo -e "${GREEN}[SUCCESS]${NC} $1"; }
@@ -95,7 +96,7 @@ generate_uuid() {
     if command -v uuidgen &> /dev/null; then
         uuidgen
     else
-        cat /proc/sys/kernel/random/uuid
+        echo "$(</proc/sys/kernel/random/uuid)"
     fi
 }
 
@@ -107,6 +108,37 @@ generate_short_id() {
     openssl rand -hex 8
 }
 
+# Внешний IP запрашивается в нескольких местах (ссылка, файл клиента) -
+# кэшируем результат, чтобы не ходить в сеть повторно. Вызывается в
+# текущем шелле (не через $(...)), иначе кэш не сохранится.
+SERVER_IP=""
+SERVER_IP_PREFETCH_FILE=""
+SERVER_IP_PREFETCH_PID=""
+
+# Запрос внешнего IP уходит в фон еще до интерактивных вопросов: пока
+# пользователь выбирает протокол, сетевой запрос уже выполняется, и к
+# моменту генерации ссылки ответ обычно готов.
+prefetch_server_ip() {
+    SERVER_IP_PREFETCH_FILE=$(mktemp)
+    curl -s --max-time 10 ifconfig.me > "$SERVER_IP_PREFETCH_FILE" 2>/dev/null &
+    SERVER_IP_PREFETCH_PID=$!
+}
+
+ensure_server_ip() {
+    if [ -n "$SERVER_IP" ]; then
+        return
+    fi
+    if [ -n "$SERVER_IP_PREFETCH_PID" ]; then
+        wait "$SERVER_IP_PREFETCH_PID" 2>/dev/null || true
+        SERVER_IP=$(<"$SERVER_IP_PREFETCH_FILE")
+        rm -f "$SERVER_IP_PREFETCH_FILE"
+        SERVER_IP_PREFETCH_PID=""
+    fi
+    if [ -z "$SERVER_IP" ]; then
+        SERVER_IP=$(curl -s --max-time 10 ifconfig.me)
+    fi
+}
+
 generate_ss_password() {
     openssl rand -base64 32
 }
@@ -115,6 +147,27 @@ generate_ss_password() {
 # Пользовательский ввод
 # ========================================
 
+# Таблицы выбора вместо цепочек case: ответ пользователя - это ключ,
+# одна подстановка вместо перебора веток
+declare -rA PROTOCOL_TABLE=(
+    [1]="vless-vision-reality"
+    [2]="vless-xhttp-reality"
+    [3]="vless-grpc-reality"
+    [4]="vless-ws-tls"
+    [5]="shadowsocks-2022"
+)
+declare -rA SNI_TABLE=(
+    [1]="www.microsoft.com"
+    [2]="www.apple.com"
+    [3]="www.cloudflare.com"
+    [4]="www.yahoo.com"
+    [5]="www.amazon.com"
+)
+declare -rA FINGERPRINT_TABLE=(
+    [1]="chrome" [2]="firefox" [3]="safari" [4]="ios"
+    [5]="android" [6]="edge" [7]="random"
+)
+
 get_user_input() {
     clear
     echo "═════════════════════════════════════════════════════════"
@@ -146,14 +199,11 @@ get_user_input() {
     echo "═════════════════════════════════════════════════════════"
     read -p "Выбор [1-5]: " PROTOCOL_CHOICE
     
-    case $PROTOCOL_CHOICE in
-        1) PROTOCOL="vless-vision-reality" ;;
-        2) PROTOCOL="vless-xhttp-reality" ;;
-        3) PROTOCOL="vless-grpc-reality" ;;
-        4) PROTOCOL="vless-ws-tls" ;;
-        5) PROTOCOL="shadowsocks-2022" ;;
-        *) log_error "Неверный выбор"; exit 1 ;;
-    esac
+    PROTOCOL=${PROTOCOL_TABLE[${PROTOCOL_CHOICE:-_}]:-}
+    if [ -z "$PROTOCOL" ]; then
+        log_error "Неверный выбор"
+        exit 1
+    fi
     
     # UUID
     DEFAULT_UUID=$(generate_uuid)
@@ -176,15 +226,11 @@ get_user_input() {
         echo "  6) Свой вариант"
         read -p "Выберите SNI [1-6]: " SNI_CHOICE
         
-        case $SNI_CHOICE in
-            1) SNI="www.microsoft.com" ;;
-            2) SNI="www.apple.com" ;;
-            3) SNI="www.cloudflare.com" ;;
-            4) SNI="www.yahoo.com" ;;
-            5) SNI="www.amazon.com" ;;
-            6) read -p "Введите SNI: " SNI ;;
-            *) SNI="www.microsoft.com" ;;
-        esac
+        if [ "$SNI_CHOICE" == "6" ]; then
+            read -p "Введите SNI: " SNI
+        else
+            SNI=${SNI_TABLE[${SNI_CHOICE:-_}]:-www.microsoft.com}
+        fi
         
         # Fingerprint
         echo ""
@@ -198,16 +244,7 @@ get_user_input() {
         echo "  7) random"
         read -p "Выбор [1-7]: " FP_CHOICE
         
-        case $FP_CHOICE in
-            1) FINGERPRINT="chrome" ;;
-            2) FINGERPRINT="firefox" ;;
-            3) FINGERPRINT="safari" ;;
-            4) FINGERPRINT="ios" ;;
-            5) FINGERPRINT="android" ;;
-            6) FINGERPRINT="edge" ;;
-            7) FINGERPRINT="random" ;;
-            *) FINGERPRINT="chrome" ;;
-        esac
+        FINGERPRINT=${FINGERPRINT_TABLE[${FP_CHOICE:-_}]:-chrome}
         
         # Генерация Reality ключей
         log_info "Генерация Reality ключей..."
@@ -543,24 +580,25 @@ EOF
 # ========================================
 
 generate_client_link() {
-    SERVER_IP=$(curl -s ifconfig.me)
+    ensure_server_ip
+    
+    # Общие части ссылки собираются один раз, ветки case добавляют
+    # только свои параметры
+    local BASE="vless://${USER_UUID}@${SERVER_IP}:${PORT}?encryption=none"
+    local REALITY_PARAMS="security=reality&sni=${SNI}&fp=${FINGERPRINT}&pbk=${PUBLIC_KEY}&sid=${SHORT_ID}"
     
     case $PROTOCOL in
         "vless-vision-reality")
-            LINK="vless://${USER_UUID}@${SERVER_IP}:${PORT}?encryption=none&flow=xtls-rprx-vision&security=reality&sni=${SNI}&fp=${FINGERPRINT}&pbk=${PUBLIC_KEY}&sid=${SHORT_ID}&type=tcp#XrayVisionReality"
+            LINK="${BASE}&flow=xtls-rprx-vision&${REALITY_PARAMS}&type=tcp#XrayVisionReality"
             ;;
         "vless-xhttp-reality")
-            LINK="vless://${USER_UUID}@${SERVER_IP}:${PORT}?encryption=none&security=reality&sni=${SNI}&fp=${FINGERPRINT}&pbk=${PUBLIC_KEY}&sid=${SHORT_ID}&type=xhttp&path=${XHTTP_PATH}&host=${SNI}#XrayXHTTPReality"
+            LINK="${BASE}&${REALITY_PARAMS}&type=xhttp&path=${XHTTP_PATH}&host=${SNI}#XrayXHTTPReality"
             ;;
         "vless-grpc-reality")
-            LINK="vless://${USER_UUID}@${SERVER_IP}:${PORT}?encryption=none&security=reality&sni=${SNI}&fp=${FINGERPRINT}&pbk=${PUBLIC_KEY}&sid=${SHORT_ID}&type=grpc&serviceName=${GRPC_SERVICE}#XrayGRPCReality"
+            LINK="${BASE}&${REALITY_PARAMS}&type=grpc&serviceName=${GRPC_SERVICE}#XrayGRPCReality"
             ;;
         "vless-ws-tls")
-            if [ -n "$DOMAIN" ]; then
-                LINK="vless://${USER_UUID}@${DOMAIN}:${PORT}?encryption=none&security=tls&type=ws&path=${WS_PATH}#XrayWebSocket"
-            else
-                LINK="vless://${USER_UUID}@${SERVER_IP}:${PORT}?encryption=none&security=tls&type=ws&path=${WS_PATH}#XrayWebSocket"
-            fi
+            LINK="vless://${USER_UUID}@${DOMAIN:-$SERVER_IP}:${PORT}?encryption=none&security=tls&type=ws&path=${WS_PATH}#XrayWebSocket"
             ;;
         "shadowsocks-2022")
             LINK="ss://$(echo -n "2022-blake3-aes-256-gcm:$SS_PASSWORD" | base64)@${SERVER_IP}:${SS_PORT}#XraySS2022"
@@ -572,6 +610,7 @@ generate_client_link() {
 
 save_client_info() {
     local CLIENT_FILE="/root/xray_client_info.txt"
+    ensure_server_ip
     local LINK=$(generate_client_link)
     
     cat > $CLIENT_FILE <<EOF
@@ -580,7 +619,7 @@ save_client_info() {
 ═════════════════════════════════════════════════════════
 
 Протокол: $PROTOCOL
-Сервер: $(curl -s ifconfig.me)
+Сервер: $SERVER_IP
 EOF
 
     case $PROTOCOL in
@@ -670,6 +709,7 @@ main() {
     install_dependencies
     install_xray
     enable_bbr
+    prefetch_server_ip
     
     get_user_input
     
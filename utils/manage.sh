@@ -12,6 +12,7 @@ GREEN='\033[0;32m'
 YELLOW='\033[1;33m'
 BLUE='\033[0;34m'
 NC='\033[0m'
+readonly RED GREEN YELLOW BLUE NC
 
 log_info() { echo -e "${BLUE}[INFO]${NC} $1"; }
 log_success() { echo -e "${GREEN}[SUCCESS]${NC} $1"; }
@@ -20,6 +21,11 @@ log_error() { echo -e "${RED}[ERROR]${NC} $1"; }
 
 CONFIG_FILE="/usr/local/etc/xray/config.json"
 INFO_FILE="/root/xray_client_info.txt"
+BACKUP_DIR="/root/xray_backups"
+# Журнал SHA-256 конфигураций, успешно прошедших проверку в write_config:
+# при восстановлении такого содержимого xray -test можно не повторять
+BACKUP_JOURNAL="$BACKUP_DIR/.journal"
+readonly CONFIG_FILE INFO_FILE BACKUP_DIR BACKUP_JOURNAL
 
 if [[ $EUID -ne 0 ]]; then
    log_error "Этот скрипт должен быть запущен от root"
@@ -31,16 +37,185 @@ if [ ! -f "$CONFIG_FILE" ]; then
     exit 1
 fi
 
+# ========================================
+# Блокировка конфигурации
+# ========================================
+
+# Несколько копий скрипта (или cron-бэкап) могут работать одновременно.
+# Читатели берут разделяемую блокировку, а мутации (add/remove/port)
+# удерживают эксклюзивную через lock_config/unlock_config на весь цикл
+# чтение-изменение-запись: иначе две копии прочитали бы одну версию и
+# последняя молча затерла бы изменения первой. Дескриптор 200 наследуется
+# сабшеллами конвейера как одно открытое описание файла, и flock не
+# считает вложенность - внутренний flock -s/-u понизил или снял бы
+# внешнюю блокировку, поэтому при взведенном CONFIG_LOCKED внутренние
+# операции с замком пропускаются. systemctl restart выполняется уже
+# после снятия блокировки.
+LOCK_FILE="/var/lock/xray-manage.lock"
+readonly LOCK_FILE
+exec 200>"$LOCK_FILE"
+
+CONFIG_LOCKED=""
+lock_config() {
+    flock -x 200
+    CONFIG_LOCKED=1
+}
+unlock_config() {
+    CONFIG_LOCKED=""
+    flock -u 200
+}
+
+# ========================================
+# Кэш конфигурации
+# ========================================
+
+# Присваивания внутри конвейера или $(...) происходят в сабшелле и не
+# видны родителю, поэтому кэш наполняет только load_config, вызываемая в
+# текущем шелле перед конвейерами. read_config после этого лишь выводит
+# готовую строку и безопасна в сабшеллах.
+CONFIG_CACHE=""
+CONFIG_CACHE_MTIME=""
+# Кэшируем только конфигурации разумного размера: многомегабайтный файл
+# (сотни клиентов) невыгодно держать строкой в памяти шелла и прогонять
+# через printf - такой read_config стримит напрямую из файла.
+CONFIG_CACHE_MAX_BYTES=1048576
+readonly CONFIG_CACHE_MAX_BYTES
+
+# Наполняет кэш, перечитывая файл только если изменился mtime.
+# Вызывать в текущем шелле - НЕ через $(...) и не в конвейере.
+load_config() {
+    local size mtime
+    [ -n "$CONFIG_LOCKED" ] || flock -s 200
+    read -r size mtime <<< "$(stat -c '%s %y' "$CONFIG_FILE" 2>/dev/null)"
+    if [ "${size:-0}" -gt "$CONFIG_CACHE_MAX_BYTES" ]; then
+        invalidate_config_cache
+    elif [ -z "$CONFIG_CACHE" ] || [ "$mtime" != "$CONFIG_CACHE_MTIME" ]; then
+        CONFIG_CACHE=$(<"$CONFIG_FILE")
+        CONFIG_CACHE_MTIME=$mtime
+    fi
+    [ -n "$CONFIG_LOCKED" ] || flock -u 200
+}
+
+# Выводит конфигурацию: из теплого кэша без обращения к диску, иначе
+# потоково из файла (слишком большой конфиг или load_config не вызывали).
+read_config() {
+    if [ -n "$CONFIG_CACHE" ]; then
+        printf '%s\n' "$CONFIG_CACHE"
+    else
+        [ -n "$CONFIG_LOCKED" ] || flock -s 200
+        cat "$CONFIG_FILE"
+        [ -n "$CONFIG_LOCKED" ] || flock -u 200
+    fi
+}
+
+invalidate_config_cache() {
+    CONFIG_CACHE=""
+    CONFIG_CACHE_MTIME=""
+}
+
+# QR-код детерминирован по ссылке, а qrencode - чистый CPU (Рид-Соломон
+# + растеризация). Кэшируем готовый ANSI-вывод по хэшу ссылки, чтобы
+# повторный показ того же клиента не перекодировал QR заново.
+QR_CACHE_DIR="/root/.cache/xray-qr"
+readonly QR_CACHE_DIR
+render_qr() {
+    local link=$1
+    local key cache
+    key=$(echo "$link" | sha256sum | awk '{print $1}')
+    cache="$QR_CACHE_DIR/$key"
+    if [ ! -f "$cache" ]; then
+        mkdir -p "$QR_CACHE_DIR"
+        echo "$link" | qrencode -t ANSIUTF8 -o "$cache"
+    fi
+    cat "$cache"
+}
+
+# Внешний IP сервера не меняется за время сеанса меню - запрашиваем
+# ifconfig.me один раз вместо обращения к сети на каждую ссылку.
+# Вызывается в текущем шелле (не через $(...)), иначе кэш не сохранится.
+SERVER_IP=""
+ensure_server_ip() {
+    if [ -z "$SERVER_IP" ]; then
+        SERVER_IP=$(curl -s --max-time 10 ifconfig.me)
+    fi
+}
+
+# Проверка конфигурации перед применением: сломанный config.json уронил
+# бы Xray при рестарте. Если бинарник xray недоступен, ограничиваемся
+# проверкой синтаксиса JSON через jq.
+validate_config() {
+    local file=$1
+    if command -v xray &> /dev/null; then
+        xray -test -c "$file" > /dev/null 2>&1
+    else
+        jq empty "$file" 2>/dev/null
+    fi
+}
+
+# Атомарная и долговечная запись конфигурации (stdin -> config.json).
+# Временный файл создается в том же каталоге: mv через /tmp не атомарен
+# между файловыми системами. sync файла до rename и каталога после -
+# иначе сбой питания может оставить пустой config.json и сломать Xray.
+write_config() {
+    local skip_validate=""
+    if [ "$1" == "--skip-validate" ]; then
+        skip_validate=1
+    fi
+    local tmp="${CONFIG_FILE}.tmp.$$"
+    [ -n "$CONFIG_LOCKED" ] || flock -x 200
+    # stdin льется сразу в tmp-файл: буферизация в переменной держала бы
+    # в памяти шелла две копии большой конфигурации
+    cat > "$tmp"
+    if [ -z "$skip_validate" ]; then
+        if ! validate_config "$tmp"; then
+            rm -f "$tmp"
+            [ -n "$CONFIG_LOCKED" ] || flock -u 200
+            return 1
+        fi
+        # Журналируем хэш прямо в точке успешной проверки: restore_config
+        # доверяет журналу, а конфигурация, правленная вручную мимо меню,
+        # проверку не проходила и в журнал не попадает
+        ensure_backup_dir
+        sha256sum "$tmp" | awk '{print $1}' >> "$BACKUP_JOURNAL"
+    fi
+    sync "$tmp" 2>/dev/null || sync
+    mv -f "$tmp" "$CONFIG_FILE"
+    sync "$(dirname "$CONFIG_FILE")" 2>/dev/null || sync
+    # Кэш здесь не трогаем: в конвейере write_config работает в сабшелле
+    # и присваивания не дошли бы до родителя - после успешной записи
+    # вызывающая функция сама делает invalidate_config_cache
+    [ -n "$CONFIG_LOCKED" ] || flock -u 200
+}
+
 # ========================================
 # Функции управления
 # ========================================
 
+# Аптайм процесса xray без запуска systemctl show: время старта - это
+# поле starttime (тики с момента загрузки) в /proc/<pid>/stat, то есть
+# два чтения из procfs вместо fork+exec.
+show_xray_uptime() {
+    local pid start_ticks clk_tck uptime_s elapsed
+    pid=$(pidof xray 2>/dev/null | awk '{print $1}') || true
+    [ -n "$pid" ] || return 0
+    # Поля считаем после закрывающей скобки: comm может содержать пробелы
+    start_ticks=$(awk '{sub(/.*\) /, ""); print $20}' "/proc/$pid/stat" 2>/dev/null) || true
+    [ -n "$start_ticks" ] || return 0
+    clk_tck=$(getconf CLK_TCK)
+    uptime_s=$(awk '{print int($1)}' /proc/uptime)
+    elapsed=$((uptime_s - start_ticks / clk_tck))
+    printf 'Аптайм xray: %d дн. %02d:%02d:%02d\n' \
+        $((elapsed / 86400)) $((elapsed % 86400 / 3600)) \
+        $((elapsed % 3600 / 60)) $((elapsed % 60))
+}
+
 show_status() {
     echo "═══════════════════════════════════════════"
     echo "  Статус Xray"
     echo "═══════════════════════════════════════════"
     systemctl status xray --no-pager
     echo ""
+    show_xray_uptime
     echo "Активные соединения:"
     ss -tulpn | grep xray || echo "Нет активных соединений"
 }
@@ -49,44 +224,90 @@ show_config() {
     echo "═══════════════════════════════════════════"
     echo "  Текущая конфигурация"
     echo "═══════════════════════════════════════════"
-    cat $CONFIG_FILE | jq .
+    load_config
+    read_config | jq .
 }
 
 show_clients() {
     echo "═══════════════════════════════════════════"
     echo "  Список клиентов"
     echo "═══════════════════════════════════════════"
-    cat $CONFIG_FILE | jq '.inbounds[0].settings.clients[]' 2>/dev/null || log_error "Ошибка чтения клиентов"
+    # Таблица одним проходом jq -r вместо вывода сырых JSON-объектов:
+    # один разбор на весь список и компактный вывод для оператора
+    load_config
+    # Статус jq проверяем до печати таблицы: через конвейер с while его
+    # код возврата терялся бы, и битая конфигурация выглядела бы как
+    # пустой список клиентов
+    local rows
+    if ! rows=$(read_config | jq -r '.inbounds[0].settings.clients[] | [.email // "-", .id, (.flow // "-")] | @tsv' 2>/dev/null); then
+        log_error "Ошибка чтения клиентов"
+        return
+    fi
+    printf '%-30s %-38s %s\n' "EMAIL" "UUID" "FLOW"
+    if [ -n "$rows" ]; then
+        while IFS=$'\t' read -r email uuid flow; do
+            printf '%-30s %-38s %s\n' "$email" "$uuid" "$flow"
+        done <<< "$rows"
+    fi
 }
 
 add_client() {
-    read -p "Email нового клиента: " NEW_EMAIL
-    NEW_UUID=$(uuidgen)
-    
-    log_info "Добавление клиента..."
-    
+    local ADDED_UUIDS=()
+    local ADDED_EMAILS=()
+
     # Определяем flow из существующего клиента
-    FLOW=$(cat $CONFIG_FILE | jq -r '.inbounds[0].settings.clients[0].flow // ""')
-    
-    # Создаем JSON нового клиента
-    if [ -z "$FLOW" ]; then
-        NEW_CLIENT='{"id":"'$NEW_UUID'","email":"'$NEW_EMAIL'"}'
-    else
-        NEW_CLIENT='{"id":"'$NEW_UUID'","flow":"'$FLOW'","email":"'$NEW_EMAIL'"}'
+    load_config
+    FLOW=$(read_config | jq -r '.inbounds[0].settings.clients[0].flow // ""')
+
+    while true; do
+        read -p "Email нового клиента: " NEW_EMAIL
+        NEW_UUID=$(uuidgen)
+
+        log_info "Добавление клиента..."
+
+        # Добавляем клиента. Объект собирает сам jq через --arg (как в
+        # remove_client): кавычка в email не ломает фильтр и не дает
+        # подсунуть лишние ключи в объект клиента.
+        # -c: на диске конфигурация хранится компактно - Xray отступы не
+        # нужны, а файл и последующие разборы вдвое меньше; для чтения
+        # человеком есть пункт меню с jq .
+        lock_config
+        load_config
+        if read_config | jq -c --arg id "$NEW_UUID" --arg email "$NEW_EMAIL" --arg flow "$FLOW" \
+            '.inbounds[0].settings.clients +=
+                [{id: $id, email: $email} + (if $flow == "" then {} else {flow: $flow} end)]' | write_config; then
+            unlock_config
+            invalidate_config_cache
+            ADDED_UUIDS+=("$NEW_UUID")
+            ADDED_EMAILS+=("$NEW_EMAIL")
+            log_success "Клиент добавлен:"
+            echo "  Email: $NEW_EMAIL"
+            echo "  UUID: $NEW_UUID"
+        else
+            unlock_config
+            log_error "Конфигурация не прошла проверку, изменения отменены"
+        fi
+
+        read -p "Добавить еще клиента? (y/n): " MORE
+        if [ "$MORE" != "y" ] && [ "$MORE" != "Y" ]; then
+            break
+        fi
+    done
+
+    if [ ${#ADDED_UUIDS[@]} -eq 0 ]; then
+        return
     fi
-    
-    # Добавляем клиента
-    cat $CONFIG_FILE | jq '.inbounds[0].settings.clients += ['$NEW_CLIENT']' > /tmp/xray_config_tmp.json
-    mv /tmp/xray_config_tmp.json $CONFIG_FILE
-    
+
+    # Один перезапуск на всю пачку: рестарт Xray - самая дорогая часть
+    # добавления, и рвет активные соединения, поэтому не делаем его
+    # после каждого клиента
     systemctl restart xray
-    
-    log_success "Клиент добавлен:"
-    echo "  Email: $NEW_EMAIL"
-    echo "  UUID: $NEW_UUID"
-    
-    # Генерация ссылки
-    generate_client_link_for_uuid "$NEW_UUID" "$NEW_EMAIL"
+
+    # Генерация ссылок
+    local i
+    for i in "${!ADDED_UUIDS[@]}"; do
+        generate_client_link_for_uuid "${ADDED_UUIDS[$i]}" "${ADDED_EMAILS[$i]}"
+    done
 }
 
 remove_client() {
@@ -94,18 +315,30 @@ remove_client() {
     echo ""
     read -p "Введите email клиента для удаления: " REMOVE_EMAIL
     
-    # Проверяем существование
-    EXISTS=$(cat $CONFIG_FILE | jq '.inbounds[0].settings.clients[] | select(.email=="'$REMOVE_EMAIL'")' 2>/dev/null)
-    
-    if [ -z "$EXISTS" ]; then
+    lock_config
+    load_config
+    # Проверка существования и удаление за один проход jq: отдельная
+    # проверка означала бы второй полный разбор конфигурации. --arg
+    # заодно избавляет от подстановки email прямо в текст фильтра.
+    if ! NEW_CONFIG=$(read_config | jq -ce --arg email "$REMOVE_EMAIL" '
+        if any(.inbounds[0].settings.clients[]; .email == $email) then
+            del(.inbounds[0].settings.clients[] | select(.email == $email))
+        else
+            empty
+        end' 2>/dev/null) || [ -z "$NEW_CONFIG" ]; then
+        unlock_config
         log_error "Клиент с email '$REMOVE_EMAIL' не найден"
         return
     fi
-    
-    # Удаляем
-    cat $CONFIG_FILE | jq 'del(.inbounds[0].settings.clients[] | select(.email=="'$REMOVE_EMAIL'"))' > /tmp/xray_config_tmp.json
-    mv /tmp/xray_config_tmp.json $CONFIG_FILE
-    
+
+    if ! printf '%s\n' "$NEW_CONFIG" | write_config; then
+        unlock_config
+        log_error "Конфигурация не прошла проверку, изменения отменены"
+        return
+    fi
+    unlock_config
+    invalidate_config_cache
+
     systemctl restart xray
     
     log_success "Клиент '$REMOVE_EMAIL' удален"
@@ -115,26 +348,35 @@ generate_client_link_for_uuid() {
     local UUID=$1
     local EMAIL=$2
     
-    SERVER_IP=$(curl -s ifconfig.me)
-    PORT=$(cat $CONFIG_FILE | jq -r '.inbounds[0].port')
-    SECURITY=$(cat $CONFIG_FILE | jq -r '.inbounds[0].streamSettings.security')
-    NETWORK=$(cat $CONFIG_FILE | jq -r '.inbounds[0].streamSettings.network')
-    
+    ensure_server_ip
+
+    # Один проход jq вместо восьми: каждый вызов jq - это полный разбор
+    # JSON в отдельном процессе
+    load_config
+    eval "$(read_config | jq -r '.inbounds[0]
+        | {port: .port,
+           sec: .streamSettings.security,
+           net: .streamSettings.network,
+           sni: (.streamSettings.realitySettings.serverNames[0] // ""),
+           pbk: (.streamSettings.realitySettings.publicKey // ""),
+           sid: (.streamSettings.realitySettings.shortIds[0] // ""),
+           flow: (.settings.clients[0].flow // ""),
+           xpath: (.streamSettings.xhttpSettings.path // "/"),
+           xhost: (.streamSettings.xhttpSettings.host // "")}
+        | @sh "PORT=\(.port) SECURITY=\(.sec) NETWORK=\(.net) SNI=\(.sni) PUBLIC_KEY=\(.pbk) SHORT_ID=\(.sid) FLOW=\(.flow) XHTTP_PATH=\(.xpath) XHTTP_HOST=\(.xhost)"')"
+
+    # Общие части ссылки собираются один раз
+    local BASE="vless://${UUID}@${SERVER_IP}:${PORT}?encryption=none"
+    local REALITY_PARAMS="security=reality&sni=${SNI}&fp=chrome&pbk=${PUBLIC_KEY}&sid=${SHORT_ID}"
+
     if [ "$SECURITY" == "reality" ]; then
-        SNI=$(cat $CONFIG_FILE | jq -r '.inbounds[0].streamSettings.realitySettings.serverNames[0]')
-        PUBLIC_KEY=$(cat $CONFIG_FILE | jq -r '.inbounds[0].streamSettings.realitySettings.publicKey // empty')
-        SHORT_ID=$(cat $CONFIG_FILE | jq -r '.inbounds[0].streamSettings.realitySettings.shortIds[0]')
-        FLOW=$(cat $CONFIG_FILE | jq -r '.inbounds[0].settings.clients[0].flow // ""')
-        
         if [ "$NETWORK" == "xhttp" ]; then
-            PATH=$(cat $CONFIG_FILE | jq -r '.inbounds[0].streamSettings.xhttpSettings.path // "/"')
-            HOST=$(cat $CONFIG_FILE | jq -r '.inbounds[0].streamSettings.xhttpSettings.host // ""')
-            LINK="vless://${UUID}@${SERVER_IP}:${PORT}?encryption=none&security=reality&sni=${SNI}&fp=chrome&pbk=${PUBLIC_KEY}&sid=${SHORT_ID}&type=xhttp&path=${PATH}&host=${HOST}#${EMAIL}"
+            LINK="${BASE}&${REALITY_PARAMS}&type=xhttp&path=${XHTTP_PATH}&host=${XHTTP_HOST}#${EMAIL}"
         else
-            LINK="vless://${UUID}@${SERVER_IP}:${PORT}?encryption=none&flow=${FLOW}&security=reality&sni=${SNI}&fp=chrome&pbk=${PUBLIC_KEY}&sid=${SHORT_ID}&type=tcp#${EMAIL}"
+            LINK="${BASE}&flow=${FLOW}&${REALITY_PARAMS}&type=tcp#${EMAIL}"
         fi
     else
-        LINK="vless://${UUID}@${SERVER_IP}:${PORT}?encryption=none&security=tls&type=tcp#${EMAIL}"
+        LINK="${BASE}&security=tls&type=tcp#${EMAIL}"
     fi
     
     echo ""
@@ -142,7 +384,7 @@ generate_client_link_for_uuid() {
     echo "$LINK"
     echo ""
     echo "QR-код:"
-    echo "$LINK" | qrencode -t ANSIUTF8
+    render_qr "$LINK"
 }
 
 show_logs() {
@@ -157,15 +399,33 @@ show_logs() {
     fi
 }
 
+# Каталог бэкапов создается один раз за сеанс, а не перед каждой копией
+ensure_backup_dir() {
+    if [ ! -d "$BACKUP_DIR" ]; then
+        mkdir -p "$BACKUP_DIR"
+    fi
+}
+
 backup_config() {
-    BACKUP_DIR="/root/xray_backups"
-    mkdir -p $BACKUP_DIR
-    
-    TIMESTAMP=$(date +%Y%m%d_%H%M%S)
+    ensure_backup_dir
+
+    # printf '%(...)T' встроен в bash - метка времени без fork на date
+    printf -v TIMESTAMP '%(%Y%m%d_%H%M%S)T' -1
     BACKUP_FILE="$BACKUP_DIR/xray_config_$TIMESTAMP.json"
-    
-    cp $CONFIG_FILE $BACKUP_FILE
-    
+
+    # Два бэкапа в одну секунду не должны затирать друг друга
+    local n=1
+    while [ -e "$BACKUP_FILE" ]; do
+        BACKUP_FILE="$BACKUP_DIR/xray_config_${TIMESTAMP}_$n.json"
+        n=$((n + 1))
+    done
+
+    # Жесткая ссылка вместо копирования: write_config всегда подменяет
+    # config.json через rename, так что старый inode никогда не меняется
+    # и бэкап-ссылка остается снимком. cp - запасной вариант на случай,
+    # если каталог бэкапов вынесен на другую файловую систему.
+    ln "$CONFIG_FILE" "$BACKUP_FILE" 2>/dev/null || cp "$CONFIG_FILE" "$BACKUP_FILE"
+
     log_success "Резервная копия создана: $BACKUP_FILE"
     
     # Показываем все бэкапы
@@ -175,8 +435,6 @@ backup_config() {
 }
 
 restore_config() {
-    BACKUP_DIR="/root/xray_backups"
-    
     if [ ! -d "$BACKUP_DIR" ]; then
         log_error "Папка с резервными копиями не найдена"
         return
@@ -202,25 +460,56 @@ restore_config() {
         return
     fi
     
-    cp $BACKUP_FILE $CONFIG_FILE
+    # Страховочный снимок текущей конфигурации: неудачное восстановление
+    # должно быть обратимым тем же меню
+    SAFETY_FILE="$BACKUP_DIR/xray_config_pre_restore.json"
+    rm -f "$SAFETY_FILE"
+    ln "$CONFIG_FILE" "$SAFETY_FILE" 2>/dev/null || cp "$CONFIG_FILE" "$SAFETY_FILE"
+
+    # В журнале лежат хэши, записанные write_config в момент успешной
+    # проверки - для такого содержимого достаточно совпадения хэша;
+    # внешние и правленные вручную файлы проверяются полностью
+    WRITE_OPTS=""
+    HASH=$(sha256sum "$BACKUP_FILE" | awk '{print $1}')
+    if [ -f "$BACKUP_JOURNAL" ] && grep -qx "$HASH" "$BACKUP_JOURNAL"; then
+        log_info "Хэш найден в журнале бэкапов, пропускаем xray -test"
+        WRITE_OPTS="--skip-validate"
+    fi
+
+    if ! write_config $WRITE_OPTS < "$BACKUP_FILE"; then
+        log_error "Резервная копия не прошла проверку xray -test, восстановление отменено"
+        return
+    fi
+    invalidate_config_cache
     systemctl restart xray
     
     log_success "Конфигурация восстановлена из $BACKUP_NAME"
 }
 
 change_port() {
-    CURRENT_PORT=$(cat $CONFIG_FILE | jq -r '.inbounds[0].port')
+    load_config
+    CURRENT_PORT=$(read_config | jq -r '.inbounds[0].port')
     echo "Текущий порт: $CURRENT_PORT"
     read -p "Новый порт: " NEW_PORT
-    
+
     if [ -z "$NEW_PORT" ] || ! [[ "$NEW_PORT" =~ ^[0-9]+$ ]] || [ "$NEW_PORT" -lt 1 ] || [ "$NEW_PORT" -gt 65535 ]; then
         log_error "Неверный порт"
         return
     fi
-    
-    cat $CONFIG_FILE | jq '.inbounds[0].port = '$NEW_PORT > /tmp/xray_config_tmp.json
-    mv /tmp/xray_config_tmp.json $CONFIG_FILE
-    
+
+    # Блокировку берем только вокруг самого цикла чтение-изменение-запись:
+    # эксклюзивный замок поверх интерактивного ввода подвесил бы все
+    # остальные копии меню, пока оператор думает над ответом
+    lock_config
+    load_config
+    if ! read_config | jq -c '.inbounds[0].port = '$NEW_PORT | write_config; then
+        unlock_config
+        log_error "Конфигурация не прошла проверку, изменения отменены"
+        return
+    fi
+    unlock_config
+    invalidate_config_cache
+
     # Обновляем firewall
     if command -v ufw &> /dev/null; then
         ufw delete allow $CURRENT_PORT/tcp 2>/dev/null || true